@@ -0,0 +1,313 @@
+import os
+import json
+import sqlite3
+import hashlib
+import functools
+import threading
+import time
+import logging
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from diskcache import Cache
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+def _serialize(return_val: RETURN_VAL_TYPE) -> str:
+    return json.dumps([dumps(generation) for generation in return_val])
+
+def _deserialize(value: str) -> RETURN_VAL_TYPE:
+    return [loads(generation) for generation in json.loads(value)]
+
+
+def prompt_text(prompt: str) -> str:
+    """Turn a serialized LangChain prompt back into plain text for embedding"""
+    try:
+        messages = loads(prompt)
+        return "\n".join(str(message.content) for message in messages)
+    except Exception:
+        return prompt
+
+
+# CrewAI agent prompts start with a "You are <role>." line and end with the
+# task header, after which the ReAct scratchpad of earlier steps is appended
+_TASK_HEADER = "\nCurrent Task:"
+_SCRATCHPAD_START = "\n\nThought:"
+
+def split_prompt(text: str):
+    """Split prompt text into its role line, its body, and the ReAct scratchpad"""
+    role, _, rest = text.partition("\n")
+    start = rest.find(_SCRATCHPAD_START, max(rest.find(_TASK_HEADER), 0))
+    if start == -1:
+        return role, rest, ""
+    start += len(_SCRATCHPAD_START)
+    return role, rest[:start], rest[start:]
+
+
+class Embedder:
+    """
+    Local sentence embedder running an int8-quantized ONNX export of a
+    MiniLM-style model (e.g. sentence-transformers/all-MiniLM-L6-v2).
+    Long texts are split into overlapping windows whose embeddings are
+    averaged, so the whole prompt contributes and not just its start.
+    """
+
+    def __init__(self, model_dir: str, file_name: str = "model_quantized.onnx",
+                 max_length: int = 256, stride: int = 32):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._tokenizer.no_padding()
+        self._tokenizer.enable_truncation(max_length, stride=stride)
+        self._session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, file_name),
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+
+    def embed(self, text: str) -> np.ndarray:
+        """Return the normalized embedding of the text"""
+        encoding = self._tokenizer.encode(text)
+        windows = [encoding] + list(encoding.overflowing)
+        length = max(len(window.ids) for window in windows)
+
+        def batch(field: str) -> np.ndarray:
+            rows = [getattr(window, field) for window in windows]
+            return np.array([row + [0] * (length - len(row)) for row in rows], dtype=np.int64)
+
+        mask = batch("attention_mask")
+        feeds = {"input_ids": batch("ids"), "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = batch("type_ids")
+        hidden = self._session.run(None, feeds)[0]
+
+        # Mean-pool tokens within each window, then average the windows
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1.0)
+        vector = pooled.mean(axis=0)
+        return vector / np.linalg.norm(vector)
+
+
+class VectorIndex:
+    """
+    Exact inner-product search over the normalized embeddings of one cache
+    partition. A partition only holds prompts from one agent at one ReAct
+    step for one set of inputs, so a flat scan stays small and exact.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._ids: List[int] = []
+        self._vectors: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def add(self, row_id: int, vector: np.ndarray):
+        self._ids.append(row_id)
+        self._vectors.append(vector)
+        self._matrix = None
+
+    def search(self, query: np.ndarray, k: int = 4) -> List[int]:
+        """Return the ids of up to k most similar vectors, best first"""
+        if not self._ids:
+            return []
+        if self._matrix is None:
+            self._matrix = np.vstack(self._vectors)
+        similarities = self._matrix @ query
+        best = np.argsort(similarities)[::-1][:k]
+        return [self._ids[i] for i in best]
+
+
+class SemanticResponseCache(BaseCache):
+    """
+    LLM response cache that matches prompts by embedding similarity.
+    Only prompts from the same agent at the same ReAct step can match: the
+    role line and the exact scratchpad select a partition, and only the rest
+    of the prompt is embedded. Entries are persisted to SQLite so they survive
+    restarts; a VectorIndex per partition finds candidate matches, which are
+    then scored exactly.
+    """
+
+    def __init__(self, embed: Callable[[str], List[float]], database_path: str,
+                 threshold: float = 0.90, ttl: Optional[float] = None):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # A miss embeds the prompt in lookup() and again in update()
+        self._embed = functools.lru_cache(maxsize=64)(self._embed_uncached)
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS semantic_responses (
+                id INTEGER PRIMARY KEY,
+                partition_key TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._load()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _stored_vectors(self, partition: str, dim: int):
+        """Return the ids and embedding matrix of every stored entry with this dimension"""
+        rows = self._conn.execute(
+            "SELECT id, embedding FROM semantic_responses WHERE partition_key = ? ORDER BY id", (partition,)
+        ).fetchall()
+        rows = [(row_id, np.frombuffer(embedding, dtype=np.float32)) for row_id, embedding in rows]
+        rows = [(row_id, vector) for row_id, vector in rows if vector.shape[0] == dim]
+        return [row_id for row_id, _ in rows], np.vstack([vector for _, vector in rows])
+
+    def _load(self):
+        """Drop expired entries and index the remaining embeddings"""
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM semantic_responses WHERE created_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+        latest = self._conn.execute(
+            "SELECT partition_key, embedding FROM semantic_responses WHERE id IN "
+            "(SELECT MAX(id) FROM semantic_responses GROUP BY partition_key)"
+        ).fetchall()
+        for partition, embedding in latest:
+            # Only vectors from the most recent embedding model are comparable
+            dim = len(embedding) // np.dtype(np.float32).itemsize
+            row_ids, matrix = self._stored_vectors(partition, dim)
+            index = VectorIndex(dim)
+            for row_id, vector in zip(row_ids, matrix):
+                index.add(row_id, vector)
+            self._indexes[partition] = index
+
+    @staticmethod
+    def _partition(prompt: str, llm_string: str):
+        """Return the partition key of a prompt and the part of it to embed"""
+        role, body, scratchpad = split_prompt(prompt_text(prompt))
+        partition = hashlib.sha256(json.dumps([llm_string, role, scratchpad]).encode()).hexdigest()
+        return partition, body
+
+    def _embed_uncached(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(self.embed(text), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Could not embed prompt for the response cache: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return the cached response of the most similar prompt, if close enough"""
+        partition, body = self._partition(prompt, llm_string)
+        if partition not in self._indexes:
+            return None
+        query = self._embed(body)
+        if query is None:
+            return None
+
+        with self._lock:
+            index = self._indexes.get(partition)
+            if index is None or index.dim != query.shape[0]:
+                return None
+            candidates = index.search(query)
+            if not candidates:
+                return None
+            rows = self._conn.execute(
+                f"SELECT embedding, response, created_at FROM semantic_responses "
+                f"WHERE id IN ({', '.join('?' * len(candidates))})",
+                candidates
+            ).fetchall()
+
+        best_similarity, best_response = -1.0, None
+        for embedding, response, created_at in rows:
+            similarity = float(np.frombuffer(embedding, dtype=np.float32) @ query)
+            if similarity > best_similarity and not self._is_expired(created_at):
+                best_similarity, best_response = similarity, response
+        if best_similarity < self.threshold:
+            return None
+        logger.info(f"Response cache hit (similarity {best_similarity:.3f})")
+        return _deserialize(best_response)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store a fresh response under the prompt's embedding"""
+        partition, body = self._partition(prompt, llm_string)
+        vector = self._embed(body)
+        if vector is None:
+            return
+        response = _serialize(return_val)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO semantic_responses (partition_key, embedding, response, created_at) VALUES (?, ?, ?, ?)",
+                (partition, vector.tobytes(), response, time.time())
+            )
+            self._conn.commit()
+
+            index = self._indexes.get(partition)
+            if index is None or index.dim != vector.shape[0]:
+                # New partition, or the embedding model changed and old vectors are not comparable
+                index = self._indexes[partition] = VectorIndex(vector.shape[0])
+            index.add(cursor.lastrowid, vector)
+
+    def clear(self, **kwargs) -> None:
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM semantic_responses")
+            self._conn.commit()
+            self._indexes.clear()
+
+
+class ExactResponseCache(BaseCache):
+    """
+    On-disk LRU cache of LLM responses keyed by the exact prompt and model
+    settings. Lookups are a hash and a disk read, so it sits in front of the
+    semantic cache to answer exact repeats without computing an embedding.
+    """
+
+    def __init__(self, directory: str, ttl: Optional[float] = None, size_limit: int = 1 << 30):
+        self.ttl = ttl
+        self._cache = Cache(directory, size_limit=size_limit, eviction_policy='least-recently-used')
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        # llm_string already encodes the model, temperature and token limits
+        return hashlib.sha256(json.dumps([llm_string, prompt]).encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return the cached response for this exact prompt, if any"""
+        value = self._cache.get(self._key(prompt, llm_string))
+        return _deserialize(value) if value is not None else None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store the response for this exact prompt"""
+        self._cache.set(self._key(prompt, llm_string), _serialize(return_val), expire=self.ttl)
+
+    def clear(self, **kwargs) -> None:
+        """Remove every cached response"""
+        self._cache.clear()
+
+
+class TieredResponseCache(BaseCache):
+    """Chain of response caches consulted in order; updates go to every layer"""
+
+    def __init__(self, *layers: BaseCache):
+        self.layers = layers
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        for layer in self.layers:
+            value = layer.lookup(prompt, llm_string)
+            if value is not None:
+                return value
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        for layer in self.layers:
+            layer.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs) -> None:
+        for layer in self.layers:
+            layer.clear(**kwargs)
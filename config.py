@@ -1,10 +1,25 @@
 import os
+import re
+import json
 import time
+import hashlib
+import asyncio
 import random
+import itertools
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import cached_property, lru_cache
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.caches import BaseCache
+from langchain_core.language_models.chat_models import generate_from_stream
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
 from google.api_core.exceptions import ResourceExhausted
 import logging
+from cache import Embedder, ExactResponseCache, SemanticResponseCache, TieredResponseCache
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,6 +28,26 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Matches the retry hint in Gemini rate-limit errors
+_RETRY_DELAY_RE = re.compile(r'retry_delay\s*{\s*seconds:\s*(\d+)')
+
+# Shape of a Google API key
+_GOOGLE_API_KEY_RE = re.compile(r'^AIza[0-9A-Za-z_-]{35}$')
+
+def _positive_int_env(name: str, default: int) -> int:
+    """Read a positive integer setting from the environment, falling back to the default"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        logger.warning(f"{name} must be a positive integer, got {value!r}. Using {default}.")
+        return default
+    return number
+
 class Config:
     """
     Enhanced Configuration class for the Job Posting Crew application.
@@ -32,24 +67,43 @@ class Config:
     EXPONENTIAL_BACKOFF_MULTIPLIER = 2.0
     JITTER_MAX = 2.0  # Add randomness to avoid thundering herd
     
+    # Proactive pacing of Gemini requests
+    GEMINI_QPM = _positive_int_env('GEMINI_QPM', 60)  # Requests per minute to stay under
+    
+    # Response cache configuration
+    EXACT_CACHE_DIR = os.getenv('EXACT_CACHE_DIR', '.llm_cache')
+    EXACT_CACHE_TTL = 86400  # Exact repeats stay valid for a day
+    EXACT_CACHE_SIZE_LIMIT = 1 << 30  # 1 GB on disk, least recently used evicted first
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', '.llm_cache.db')
+    SEMANTIC_CACHE_THRESHOLD = 0.90  # Minimum cosine similarity for a cache hit
+    RESPONSE_CACHE_TTL = 3600  # Seconds before a cached response goes stale
+    EMBEDDING_MODEL_DIR = os.getenv('EMBEDDING_MODEL_DIR', 'models/all-MiniLM-L6-v2-int8')
+    
     # LLM Configuration with conservative settings
-    @property
+    @cached_property
     def DEFAULT_LLM(self):
-        """Initialize and return the default LLM with conservative settings"""
+        """
+        Initialize the default LLM with conservative settings on first access.
+        The same instance, and so the same Gemini client, is shared by every agent.
+        """
         if not self.GOOGLE_API_KEY:
             raise ValueError("GOOGLE_API_KEY is required for Gemini LLM")
         
-        return ChatGoogleGenerativeAI(
+        return CachedChatGoogleGenerativeAI(
             model="gemini-1.5-flash",
             google_api_key=self.GOOGLE_API_KEY,
             temperature=0.7,
             max_tokens=800,  # Further reduced to minimize quota usage
             request_timeout=120,  # Increased timeout
             max_retries=0,  # Disable built-in retries to handle them manually
+            transport='grpc',  # One long-lived channel for every request
             # Add rate limiting parameters
             rate_limiter=None  # We'll handle rate limiting manually
         )
     
+    # Run a separate review agent after drafting instead of a single draft-and-review call
+    HIGH_QUALITY_MODE = os.getenv('HIGH_QUALITY_MODE', '').lower() in ('1', 'true', 'yes')
+    
     # Agent Configuration - reduced verbosity to minimize API calls
     AGENT_VERBOSE = False  # Disabled to reduce API calls
     CREW_VERBOSE = 0  # Minimal verbosity
@@ -61,13 +115,14 @@ class Config:
             base_delay = Config.BASE_REQUEST_DELAY
             
         # Exponential backoff
-        delay = min(
-            base_delay * (Config.EXPONENTIAL_BACKOFF_MULTIPLIER ** attempt),
-            Config.MAX_REQUEST_DELAY
-        )
+        if attempt < len(_BACKOFF_FACTORS):
+            factor = _BACKOFF_FACTORS[attempt]
+        else:
+            factor = Config.EXPONENTIAL_BACKOFF_MULTIPLIER ** attempt
+        delay = min(base_delay * factor, Config.MAX_REQUEST_DELAY)
         
         # Add jitter to prevent thundering herd
-        jitter = random.uniform(0, Config.JITTER_MAX)
+        jitter = _JITTER_LUT[next(_jitter_index)]
         return delay + jitter
     
     @staticmethod
@@ -92,17 +147,11 @@ class Config:
     @staticmethod
     def extract_retry_delay(error_message: str) -> int:
         """Extract retry delay from error message if available"""
-        try:
-            # Look for retry_delay in the error message
-            if "retry_delay" in error_message and "seconds" in error_message:
-                # Extract the seconds value
-                import re
-                match = re.search(r'retry_delay\s*{\s*seconds:\s*(\d+)', error_message)
-                if match:
-                    return int(match.group(1))
-        except Exception:
-            pass
-        return None
+        # Cheap substring check skips the regex for most errors
+        if "retry_delay" not in error_message:
+            return None
+        match = _RETRY_DELAY_RE.search(error_message)
+        return int(match.group(1)) if match else None
     
     @staticmethod
     def execute_with_retry(func, *args, max_retries: int = None, **kwargs):
@@ -148,8 +197,15 @@ class Config:
     
     # Enhanced Validation
     @classmethod
-    def validate_required_keys(cls):
-        """Validate that required API keys are present and check quotas"""
+    def validate_required_keys(cls, live: bool = False):
+        """Validate the required API keys, probing the Gemini API only if live is set"""
+        if live:
+            return cls.validate_required_keys_live()
+        return cls.validate_required_keys_fast()
+    
+    @classmethod
+    def validate_required_keys_fast(cls):
+        """Check that required API keys are present and well-formed, without any API calls"""
         missing_keys = []
         
         if not cls.GOOGLE_API_KEY:
@@ -163,6 +219,18 @@ class Config:
             logger.info("Please set these in your .env file or environment variables.")
             return False
         
+        if not _GOOGLE_API_KEY_RE.match(cls.GOOGLE_API_KEY):
+            logger.error("GOOGLE_API_KEY does not look like a Google API key")
+            return False
+        
+        return True
+    
+    @classmethod
+    def validate_required_keys_live(cls):
+        """Validate the API keys and check quotas with a minimal Gemini request"""
+        if not cls.validate_required_keys_fast():
+            return False
+        
         # Test the Gemini API key with a minimal request
         try:
             logger.info("Testing Gemini API connection...")
@@ -218,6 +286,194 @@ class Config:
         print("6. Test with smaller inputs first")
         print("="*50)
 
+# Precomputed backoff multipliers and jitter values for calculate_delay
+_BACKOFF_FACTORS = [Config.EXPONENTIAL_BACKOFF_MULTIPLIER ** i for i in range(Config.MAX_RETRIES + 1)]
+_JITTER_LUT = [random.uniform(0, Config.JITTER_MAX) for _ in range(1024)]
+_jitter_index = itertools.cycle(range(len(_JITTER_LUT)))
+
+def get_cache_embedder():
+    """
+    Return the embedding function for the semantic cache, or None when the
+    local int8 ONNX model has not been exported to EMBEDDING_MODEL_DIR.
+    Remote embeddings would add a network call to every cache lookup.
+    """
+    if not os.path.isdir(Config.EMBEDDING_MODEL_DIR):
+        logger.info("No local embedding model found, semantic response cache disabled")
+        return None
+    try:
+        return Embedder(Config.EMBEDDING_MODEL_DIR).embed
+    except Exception as e:
+        logger.warning(f"Could not load local embedding model, semantic response cache disabled: {e}")
+        return None
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> TieredResponseCache:
+    """
+    Return the response cache shared by every cached LLM instance:
+    exact prompt matches first, then semantically similar prompts.
+    """
+    layers = [
+        ExactResponseCache(
+            directory=Config.EXACT_CACHE_DIR,
+            ttl=Config.EXACT_CACHE_TTL,
+            size_limit=Config.EXACT_CACHE_SIZE_LIMIT
+        )
+    ]
+    embed = get_cache_embedder()
+    if embed is not None:
+        layers.append(SemanticResponseCache(
+            embed=embed,
+            database_path=Config.RESPONSE_CACHE_PATH,
+            threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+            ttl=Config.RESPONSE_CACHE_TTL
+        ))
+    return TieredResponseCache(*layers)
+
+# Identifies the inputs of the crew run in progress. It is part of every
+# response cache key, so one company's responses are never served to another.
+_response_cache_scope = ContextVar('response_cache_scope', default='')
+
+@contextmanager
+def response_cache_scope(inputs: dict):
+    """Keep responses cached inside this block apart from runs with other inputs"""
+    scope = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+    token = _response_cache_scope.set(scope)
+    try:
+        yield
+    finally:
+        _response_cache_scope.reset(token)
+
+def _cached_chunks(generations):
+    """Replay cached generations as a stream of a single chunk"""
+    message = generations[0].message
+    yield ChatGenerationChunk(
+        message=AIMessageChunk(content=message.content, additional_kwargs=message.additional_kwargs),
+        generation_info=generations[0].generation_info
+    )
+
+class RateLimiter:
+    """
+    Paces requests to at most `qpm` per minute with a bounded number in flight.
+    Works from worker threads (CrewAI runs agents in threads) and from asyncio.
+    """
+    
+    def __init__(self, qpm: int, max_concurrency: int = None):
+        if qpm < 1:
+            raise ValueError(f"qpm must be at least 1, got {qpm}")
+        if max_concurrency is None:
+            max_concurrency = max(1, qpm // 60 * 5)
+        self.min_interval = 60.0 / qpm
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+    
+    def _reserve(self) -> float:
+        """Claim the next start slot and return how long to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+            return start - now
+    
+    @contextmanager
+    def limit(self):
+        """Hold a request slot, waiting for one to free up and for pacing"""
+        self._slots.acquire()
+        try:
+            delay = self._reserve()
+            if delay > 0:
+                time.sleep(delay)
+            yield
+        finally:
+            self._slots.release()
+    
+    @asynccontextmanager
+    async def alimit(self):
+        """Async version of limit that waits without blocking the event loop"""
+        # Poll instead of blocking a worker thread on the semaphore, so a
+        # cancelled wait can never acquire a slot that is then not released
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(0.05)
+        try:
+            delay = self._reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield
+        finally:
+            self._slots.release()
+
+# Shared by every Gemini chat model so the limit holds across agents
+rate_limiter = RateLimiter(Config.GEMINI_QPM)
+
+class CachedChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+    """
+    Gemini chat model that answers from the shared response cache when the
+    same or a sufficiently similar prompt has been seen before, and paces the
+    remaining calls through the shared rate limiter.
+    CrewAI agents call stream(), which streams tokens from Gemini as they are
+    generated but skips LangChain's cache lookup in generate(), so _stream
+    and _astream apply the cache and the limiter themselves.
+    """
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault('cache', get_response_cache())
+        super().__init__(**kwargs)
+    
+    def _get_llm_string(self, stop=None, **kwargs) -> str:
+        # Built from the generation settings only: LangChain's default serializes
+        # the model, including client object addresses that change on every run
+        params = self._get_invocation_params(stop=stop, **kwargs)
+        params.update(top_p=self.top_p, max_output_tokens=self.max_output_tokens)
+        return f"{sorted(params.items())}---scope:{_response_cache_scope.get()}"
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with rate_limiter.limit():
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+    
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        async with rate_limiter.alimit():
+            return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+    
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        cache = self.cache if isinstance(self.cache, BaseCache) else None
+        if cache is not None:
+            prompt, llm_string = dumps(messages), self._get_llm_string(stop=stop, **kwargs)
+            cached = cache.lookup(prompt, llm_string)
+            if cached:
+                for chunk in _cached_chunks(cached):
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text)
+                    yield chunk
+                return
+        
+        chunks = []
+        with rate_limiter.limit():
+            for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                chunks.append(chunk)
+                yield chunk
+        if cache is not None:
+            cache.update(prompt, llm_string, generate_from_stream(iter(chunks)).generations)
+    
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        cache = self.cache if isinstance(self.cache, BaseCache) else None
+        if cache is not None:
+            prompt, llm_string = dumps(messages), self._get_llm_string(stop=stop, **kwargs)
+            cached = await cache.alookup(prompt, llm_string)
+            if cached:
+                for chunk in _cached_chunks(cached):
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.text)
+                    yield chunk
+                return
+        
+        chunks = []
+        async with rate_limiter.alimit():
+            async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                chunks.append(chunk)
+                yield chunk
+        if cache is not None:
+            await cache.aupdate(prompt, llm_string, generate_from_stream(iter(chunks)).generations)
+
 # Initialize configuration
 config = Config()
 
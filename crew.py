@@ -1,45 +1,66 @@
 from crewai import Crew, Process
 from agents import create_research_agent, create_writer_agent, create_review_agent
 from tasks import (
-    create_research_company_culture_task,
-    create_research_role_requirements_task,
+    CombinedResearch,
+    create_combined_research_task,
+    create_draft_and_review_task,
     create_draft_job_posting_task,
     create_review_and_edit_job_posting_task,
-    create_industry_analysis_task
+    parse_combined_research
 )
-from config import config
+from config import config, response_cache_scope
 
 class JobPostingCrew:
     """JobPosting crew"""
     
     def __init__(self):
-        # Initialize agents
+        # Each crew gets its own agents and tasks, since CrewAI mutates both on
+        # kickoff; the LLM and tools behind them are shared across crews
         self.research_agent = create_research_agent()
         self.writer_agent = create_writer_agent()
-        self.review_agent = create_review_agent()
+        self.agents = [self.research_agent, self.writer_agent]
         
-        # Initialize tasks
-        self.research_company_culture_task = create_research_company_culture_task(self.research_agent)
-        self.research_role_requirements_task = create_research_role_requirements_task(self.research_agent)
-        self.draft_job_posting_task = create_draft_job_posting_task(self.writer_agent)
-        self.review_and_edit_job_posting_task = create_review_and_edit_job_posting_task(self.review_agent)
-        self.industry_analysis_task = create_industry_analysis_task(self.research_agent)
+        # Initialize tasks - culture, role requirements, and industry research
+        # share one LLM call whose JSON output feeds the writing
+        self.research_task = create_combined_research_task(self.research_agent)
+        if config.HIGH_QUALITY_MODE:
+            # Separate draft and review calls by two different agents
+            self.review_agent = create_review_agent()
+            self.agents.append(self.review_agent)
+            self.draft_job_posting_task = create_draft_job_posting_task(
+                self.writer_agent,
+                context=[self.research_task]
+            )
+            self.review_and_edit_job_posting_task = create_review_and_edit_job_posting_task(self.review_agent)
+            self.writing_tasks = [self.draft_job_posting_task, self.review_and_edit_job_posting_task]
+        else:
+            # The writer drafts, critiques, and polishes in one call
+            self.draft_and_review_task = create_draft_and_review_task(
+                self.writer_agent,
+                context=[self.research_task]
+            )
+            self.writing_tasks = [self.draft_and_review_task]
 
     def crew(self) -> Crew:
         """Creates the JobPostingCrew"""
         return Crew(
-            agents=[
-                self.research_agent,
-                self.writer_agent,
-                self.review_agent
-            ],
-            tasks=[
-                self.research_company_culture_task,
-                self.research_role_requirements_task,
-                self.draft_job_posting_task,
-                self.review_and_edit_job_posting_task,
-                self.industry_analysis_task
-            ],
+            agents=self.agents,
+            tasks=[self.research_task] + self.writing_tasks,
             process=Process.sequential,
             verbose=config.CREW_VERBOSE,
-        )
\ No newline at end of file
+        )
+
+    def research_results(self) -> CombinedResearch:
+        """Return the structured research from the last kickoff"""
+        output = self.research_task.output
+        if output is None:
+            raise ValueError("The crew has not been kicked off yet")
+        # CrewAI has already validated the output, or recovered it with its converter
+        if isinstance(output.exported_output, dict):
+            return CombinedResearch.model_validate(output.exported_output)
+        return parse_combined_research(output.raw_output)
+
+    def kickoff(self, inputs: dict):
+        """Run the crew, reusing cached LLM responses only from runs with the same inputs"""
+        with response_cache_scope(inputs):
+            return self.crew().kickoff(inputs=inputs)
\ No newline at end of file
@@ -4,7 +4,7 @@ import time
 import json
 from datetime import datetime
 from crew import JobPostingCrew
-from config import config
+from config import config, response_cache_scope
 from google.api_core.exceptions import ResourceExhausted
 
 class OutputManager:
@@ -68,7 +68,7 @@ class OutputManager:
             return None
     
     def save_metadata(self, result, inputs: dict, company_name: str = "", 
-                     role_name: str = "") -> str:
+                     role_name: str = "", research: dict = None) -> str:
         """Save metadata as JSON file"""
         filename = self.generate_filename(company_name, role_name, "json")
         filepath = os.path.join(self.base_dir, filename)
@@ -82,6 +82,8 @@ class OutputManager:
                 "output_length": len(str(result)),
                 "file_type": "job_posting_metadata"
             }
+            if research:
+                metadata["research"] = research
             
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, indent=2, ensure_ascii=False)
@@ -217,6 +219,9 @@ class OutputManager:
 # Initialize output manager
 output_manager = OutputManager()
 
+# Probe the Gemini API at startup only when --verify-api is passed
+VERIFY_API = False
+
 def get_user_inputs():
     """Collect all required inputs from the user"""
     print("\n🎯 JOB POSTING GENERATOR - INPUT COLLECTION")
@@ -362,7 +367,7 @@ def edit_inputs(inputs):
     
     return inputs
 
-def process_and_save_output(result, inputs, company_name="", role_name=""):
+def process_and_save_output(result, inputs, company_name="", role_name="", research=None):
     """Process the result and save to both terminal and file"""
     # Print formatted output to terminal
     content = output_manager.print_formatted_output(result)
@@ -371,7 +376,7 @@ def process_and_save_output(result, inputs, company_name="", role_name=""):
     filepath = output_manager.save_job_posting(result, company_name, role_name, inputs)
     
     # Save metadata
-    metadata_path = output_manager.save_metadata(result, inputs, company_name, role_name)
+    metadata_path = output_manager.save_metadata(result, inputs, company_name, role_name, research)
     
     # Print summary
     output_manager.print_summary(filepath, metadata_path)
@@ -383,7 +388,7 @@ def run_with_rate_limiting(inputs):
     Run the crew with proper rate limiting and error handling.
     """
     # Validate configuration
-    if not config.validate_required_keys():
+    if not config.validate_required_keys(live=VERIFY_API):
         print("Please set up your API keys before running the application.")
         return None
     
@@ -403,14 +408,21 @@ def run_with_rate_limiting(inputs):
                 config.wait_between_requests()
             
             job_posting_crew = JobPostingCrew()
-            result = job_posting_crew.crew().kickoff(inputs=inputs)
+            result = job_posting_crew.kickoff(inputs)
             
             # Extract company and role names for filename
             company_name = inputs.get('company_domain', 'company').replace('.', '_').replace('/', '_')
             role_name = inputs.get('hiring_needs', 'role').split(',')[0].strip().replace(' ', '_')
             
+            # Structured research goes into the metadata file; the posting is saved either way
+            try:
+                research = job_posting_crew.research_results().model_dump()
+            except ValueError as e:
+                print(f"⚠️ Could not parse the research output: {e}")
+                research = None
+            
             # Process and save output
-            filepath, metadata_path = process_and_save_output(result, inputs, company_name, role_name)
+            filepath, metadata_path = process_and_save_output(result, inputs, company_name, role_name, research)
             
             print("\n" + "="*50)
             print("✅ Job posting creation completed successfully!")
@@ -458,7 +470,7 @@ def train():
     Train the crew for a given number of iterations.
     """
     # Validate configuration
-    if not config.validate_required_keys():
+    if not config.validate_required_keys(live=VERIFY_API):
         print("Please set up your API keys before training the application.")
         return
     
@@ -490,13 +502,15 @@ def train():
                 config.handle_rate_limit()  # Longer delay between iterations
             
             try:
-                job_posting_crew.crew().train(n_iterations=1, inputs=inputs)
+                with response_cache_scope(inputs):
+                    job_posting_crew.crew().train(n_iterations=1, inputs=inputs)
                 print(f"✅ Iteration {i+1} completed")
             except ResourceExhausted:
                 print(f"⏸️  Rate limit hit during iteration {i+1}, waiting...")
                 config.handle_rate_limit()
                 # Retry the iteration
-                job_posting_crew.crew().train(n_iterations=1, inputs=inputs)
+                with response_cache_scope(inputs):
+                    job_posting_crew.crew().train(n_iterations=1, inputs=inputs)
                 print(f"✅ Iteration {i+1} completed after retry")
         
         print(f"🎉 Training completed for {n_iterations} iterations!")
@@ -551,6 +565,9 @@ def show_help():
     print("ℹ️  INFORMATION:")
     print("  python main.py help               - Show this help message")
     print()
+    print("🔑 OPTIONS:")
+    print("  --verify-api                      - Test the Gemini API with a live request before running")
+    print()
     print("📋 REQUIRED INPUTS:")
     print("  • Company domain/website")
     print("  • Company description")
@@ -572,6 +589,10 @@ if __name__ == "__main__":
     print("🚀 Job Posting Crew Starting...")
     print("⚠️  Note: This application includes rate limiting to respect API quotas.")
     
+    if "--verify-api" in sys.argv:
+        sys.argv.remove("--verify-api")
+        VERIFY_API = True
+    
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
         
@@ -1,96 +1,129 @@
+import re
+import orjson
 from crewai import Task
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List
 
 class ResearchRoleRequirements(BaseModel):
     """Research role requirements model"""
+    model_config = ConfigDict(defer_build=True)
     skills: List[str] = Field(..., description="List of recommended skills for the ideal candidate aligned with the company's culture, ongoing projects, and the specific role's requirements.")
     experience: List[str] = Field(..., description="List of recommended experience for the ideal candidate aligned with the company's culture, ongoing projects, and the specific role's requirements.")
     qualities: List[str] = Field(..., description="List of recommended qualities for the ideal candidate aligned with the company's culture, ongoing projects, and the specific role's requirements.")
 
-def create_research_company_culture_task(agent):
-    """Create and return the research company culture task"""
-    return Task(
-        description="""
-        Analyze the provided company website and the hiring manager's company's domain {company_domain},
-        description {company_description}. Focus on understanding the company's culture, values, and mission.
-        Identify unique selling points and specific projects or achievements highlighted on the site.
-        Compile a report summarizing these insights, specifically how they can be leveraged in a job posting
-        to attract the right candidates.
-        """,
-        expected_output="""
-        A comprehensive report detailing the company's culture, values, and mission, along with specific selling
-        points relevant to the job role. Suggestions on incorporating these insights into the job posting should be included.
-        """,
-        agent=agent
-    )
+class CombinedResearch(BaseModel):
+    """Combined company culture, role requirements, and industry research model"""
+    model_config = ConfigDict(defer_build=True)
+    culture: str = Field(..., description="Report on the company's culture, values, mission, and selling points, with suggestions for using them in the job posting.")
+    role_requirements: ResearchRoleRequirements = Field(..., description="Recommended skills, experience, and qualities for the ideal candidate.")
+    industry: str = Field(..., description="Analysis of industry trends, challenges, and opportunities, and how to position the role and company within them.")
+
+# LLMs sometimes wrap the JSON in prose or code fences
+_JSON_OBJECT_RE = re.compile(r'({.*})', re.DOTALL)
+
+def _load_json(raw: str):
+    """Parse raw LLM output as JSON with orjson, falling back to the outermost object in the text"""
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        match = _JSON_OBJECT_RE.search(raw)
+        if not match:
+            raise
+        return orjson.loads(match.group(1))
+
+def parse_combined_research(raw: str) -> CombinedResearch:
+    """Parse combined research output"""
+    return CombinedResearch.model_validate(_load_json(raw))
 
-def create_research_role_requirements_task(agent):
-    """Create and return the research role requirements task"""
+# Static task instructions. Descriptions start with these and end with the
+# per-run inputs, so every run shares the same prompt prefix. Kept terse:
+# every token here is sent on each call.
+DRAFT_JOB_POSTING_INSTRUCTIONS = """
+        Draft a job posting from the research and inputs below:
+        1. Compelling company introduction.
+        2. Role description, responsibilities, required skills and qualifications.
+        3. Benefits and unique opportunities.
+        Match the company's culture in tone.
+        """
+
+REVIEW_JOB_POSTING_INSTRUCTIONS = """
+        Review and edit the draft job posting:
+        1. Fix clarity, engagement, and grammar.
+        2. Align with company culture and values; speak to target candidates.
+        3. Reflect the role's benefits accurately; note any needed revisions.
+        """
+
+DRAFT_AND_REVIEW_INSTRUCTIONS = """
+        1. Draft a job posting from the research and inputs below: compelling company introduction; role
+           description, responsibilities, required skills and qualifications; benefits and unique opportunities.
+           Match the company's culture in tone.
+        2. Critique the draft for clarity, engagement, grammar, and alignment with company values.
+        3. Revise it accordingly. Return only the final posting.
+        """
+
+COMBINED_RESEARCH_INSTRUCTIONS = """
+        Research the company, role, and industry:
+        1. culture: culture, values, mission, selling points, projects; how to use them in the posting.
+        2. role_requirements: skills, experience, qualities for the hiring needs.
+        3. industry: trends, challenges, opportunities; impact on the role's appeal.
+        Return JSON with keys `culture` (string), `role_requirements` (`skills`, `experience`, `qualities`
+        string lists), `industry` (string).
+        """
+
+def create_combined_research_task(agent):
+    """Create and return a single task covering culture, role requirements, and industry research"""
     return Task(
-        description="""
-        Based on the hiring manager's needs: {hiring_needs}, identify the key skills, experiences,
-        and qualities the ideal candidate should possess for the role. Consider the company's current projects,
-        its competitive landscape, and industry trends. Prepare a list of recommended job requirements
-        and qualifications that align with the company's needs and values.
+        description=COMBINED_RESEARCH_INSTRUCTIONS + """
+        Company domain: {company_domain}
+        Company description: {company_description}
+        Hiring needs: {hiring_needs}
         """,
         expected_output="""
-        A list of recommended skills, experiences, and qualities for the ideal candidate, aligned with
-        the company's culture, ongoing projects, and the specific role's requirements.
+        JSON: culture report, role requirements (skills, experience, qualities), industry analysis.
         """,
         agent=agent,
-        output_json=ResearchRoleRequirements
+        output_json=CombinedResearch
     )
 
-def create_draft_job_posting_task(agent):
-    """Create and return the draft job posting task"""
+def create_draft_job_posting_task(agent, context=None):
+    """Create and return the draft job posting task, using the given research tasks as context"""
     return Task(
-        description="""
-        Draft a job posting for the role described by the hiring manager: {hiring_needs}.
-        Use the insights on {company_description} to start with a compelling introduction,
-        followed by a detailed role description, responsibilities, and required skills and qualifications.
-        Ensure the tone aligns with the company's culture and incorporate any unique benefits or
-        opportunities offered by the company. Specific benefits: {specific_benefits}.
+        description=DRAFT_JOB_POSTING_INSTRUCTIONS + """
+        Hiring needs: {hiring_needs}
+        Company description: {company_description}
+        Specific benefits: {specific_benefits}
         """,
         expected_output="""
-        A detailed, engaging job posting that includes an introduction, role description, responsibilities,
-        requirements, and unique company benefits. The tone should resonate with the company's culture
-        and values, aimed at attracting the right candidates.
+        Job posting: introduction, role description, responsibilities, requirements, benefits; tone matches the culture.
         """,
-        agent=agent
+        agent=agent,
+        context=context
     )
 
 def create_review_and_edit_job_posting_task(agent):
     """Create and return the review and edit job posting task"""
     return Task(
-        description="""
-        Review the draft job posting for the role {hiring_needs}. Check for clarity, engagement, grammatical accuracy,
-        and alignment with the company's culture and values. Edit and refine the content, ensuring it speaks directly
-        to the desired candidates and accurately reflects the role's unique benefits and opportunities. Provide
-        feedback for any necessary revisions.
+        description=REVIEW_JOB_POSTING_INSTRUCTIONS + """
+        Hiring needs: {hiring_needs}
         """,
         expected_output="""
-        A polished, error-free job posting that is clear, engaging, and perfectly aligned with the company's culture and values.
-        Feedback on potential improvements and final approval for publishing. Formatted in markdown.
+        Polished, error-free job posting in markdown, plus brief feedback and publishing approval.
         """,
         agent=agent
     )
 
-def create_industry_analysis_task(agent):
-    """Create and return the industry analysis task"""
+def create_draft_and_review_task(agent, context=None):
+    """Create and return a task that drafts the job posting and self-reviews it in a single call"""
     return Task(
-        description="""
-        Conduct an in-depth analysis of the industry related to the company's domain {company_domain}.
-        Investigate current trends, challenges, and opportunities within the industry, utilizing market reports,
-        recent developments, and expert opinions. Assess how these factors could impact the role being hired
-        for and the overall attractiveness of the position to potential candidates.
-        Consider how the company's position within this industry and its response to these trends could be leveraged to attract top talent.
-        Include in your report how the role contributes to addressing industry challenges or seizing opportunities.
+        description=DRAFT_AND_REVIEW_INSTRUCTIONS + """
+        Hiring needs: {hiring_needs}
+        Company description: {company_description}
+        Specific benefits: {specific_benefits}
         """,
         expected_output="""
-        A detailed analysis report that identifies major industry trends, challenges, and opportunities relevant
-        to the company's domain and the specific job role. This report should provide strategic insights on positioning
-        the job role and the company as an attractive choice for potential candidates.
+        Polished, error-free job posting in markdown: introduction, role description, responsibilities,
+        requirements, benefits; tone matches the culture.
         """,
-        agent=agent
+        agent=agent,
+        context=context
     )
\ No newline at end of file
@@ -0,0 +1,39 @@
+import os
+
+os.environ.setdefault('GOOGLE_API_KEY', 'AIza' + '0' * 35)
+
+import numpy as np
+import pytest
+
+from config import Config
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+
+pytestmark = pytest.mark.skipif(
+    not os.path.isfile(os.path.join(Config.EMBEDDING_MODEL_DIR, "model_quantized.onnx")),
+    reason="local embedding model not exported (see README: Response Cache)"
+)
+
+
+@pytest.fixture(scope="module")
+def embedder():
+    from cache import Embedder
+    return Embedder(Config.EMBEDDING_MODEL_DIR)
+
+
+def test_embedding_is_a_normalized_vector(embedder):
+    vector = embedder.embed("Senior backend engineer for a fintech startup")
+
+    assert vector.ndim == 1
+    assert vector.dtype == np.float32
+    assert np.isclose(np.linalg.norm(vector), 1.0, atol=1e-5)
+
+
+def test_long_prompts_use_every_window(embedder):
+    # Longer than one 256-token window, so the overflow windows are pooled too
+    text = "You are Research Analyst. " * 200
+    vector = embedder.embed(text)
+
+    assert vector.shape == embedder.embed("short prompt").shape
+    assert np.isclose(np.linalg.norm(vector), 1.0, atol=1e-5)
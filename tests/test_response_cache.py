@@ -0,0 +1,108 @@
+import os
+import asyncio
+
+os.environ.setdefault('GOOGLE_API_KEY', 'AIza' + '0' * 35)
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.prompts import PromptTemplate
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+import config
+from cache import ExactResponseCache, TieredResponseCache
+from config import CachedChatGoogleGenerativeAI, RateLimiter, response_cache_scope
+
+
+@pytest.fixture(autouse=True)
+def fast_rate_limiter(monkeypatch):
+    """Keep the shared limiter from pacing the fake Gemini calls a second apart"""
+    monkeypatch.setattr(config, "rate_limiter", RateLimiter(qpm=60000))
+
+
+@pytest.fixture
+def gemini_calls(monkeypatch):
+    """Replace the Gemini streaming call and record every request that reaches it"""
+    calls = []
+    tokens = ("Thought: I now know the final answer\n", "Final Answer: posting")
+
+    def fake_stream(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(messages)
+        for token in tokens:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def fake_astream(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(messages)
+        for token in tokens:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    monkeypatch.setattr(ChatGoogleGenerativeAI, "_stream", fake_stream)
+    monkeypatch.setattr(ChatGoogleGenerativeAI, "_astream", fake_astream)
+    return calls
+
+
+def make_llm(cache_dir):
+    return CachedChatGoogleGenerativeAI(
+        model="gemini-1.5-flash",
+        google_api_key=os.environ['GOOGLE_API_KEY'],
+        cache=TieredResponseCache(ExactResponseCache(str(cache_dir)))
+    )
+
+
+def agent_step(llm):
+    """The chain CrewAI's RunnableAgent streams: prompt | llm.bind(stop) | parser"""
+    prompt = PromptTemplate.from_template("Write a job posting for {company}")
+    return prompt | llm.bind(stop=["\nObservation"]) | StrOutputParser()
+
+
+def run_agent_step(llm, company):
+    return "".join(agent_step(llm).stream({"company": company}))
+
+
+async def arun_agent_step(llm, company):
+    return "".join([token async for token in agent_step(llm).astream({"company": company})])
+
+
+def test_streamed_repeat_is_served_from_cache(tmp_path, gemini_calls):
+    llm = make_llm(tmp_path)
+
+    first = run_agent_step(llm, "example.com")
+    second = run_agent_step(llm, "example.com")
+
+    assert len(gemini_calls) == 1
+    assert second == first
+
+
+def test_cache_entries_are_scoped_by_crew_inputs(tmp_path, gemini_calls):
+    llm = make_llm(tmp_path)
+
+    with response_cache_scope({'company_domain': 'a.example'}):
+        run_agent_step(llm, "example.com")
+    with response_cache_scope({'company_domain': 'b.example'}):
+        run_agent_step(llm, "example.com")
+
+    assert len(gemini_calls) == 2
+
+
+def test_rerun_with_same_inputs_skips_gemini(tmp_path, gemini_calls):
+    inputs = {'company_domain': 'example.com', 'hiring_needs': 'Backend engineer'}
+
+    with response_cache_scope(inputs):
+        first = run_agent_step(make_llm(tmp_path), "example.com")
+    # A later kickoff builds a new model and reopens the cache directory
+    with response_cache_scope(inputs):
+        second = run_agent_step(make_llm(tmp_path), "example.com")
+
+    assert len(gemini_calls) == 1
+    assert second == first
+
+
+def test_async_streamed_repeat_is_served_from_cache(tmp_path, gemini_calls):
+    llm = make_llm(tmp_path)
+
+    first = asyncio.run(arun_agent_step(llm, "example.com"))
+    second = asyncio.run(arun_agent_step(llm, "example.com"))
+
+    assert len(gemini_calls) == 1
+    assert second == first
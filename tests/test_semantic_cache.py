@@ -0,0 +1,109 @@
+import re
+import zlib
+
+import numpy as np
+import pytest
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from cache import SemanticResponseCache, VectorIndex, split_prompt
+
+LLM_STRING = "[('model', 'models/gemini-1.5-flash'), ('stop', ['\\nObservation'])]---scope:abc"
+
+TASK = (
+    "\nCurrent Task: Research the company, role, and industry for example.com. "
+    "Report the culture, values, mission, selling points, projects, skills, "
+    "experience, qualities, trends, challenges and opportunities.\n\n"
+    "Begin! This is VERY important to you, use the tools available and give your "
+    "best Final Answer, your job depends on it!\n\nThought:"
+)
+RESEARCHER = "You are Research Analyst. Expert in analyzing company cultures.\nYour personal goal is: Analyze the company"
+WRITER = "You are Job Description Writer. Skilled in crafting job descriptions.\nYour personal goal is: Analyze the company"
+SCRATCHPAD = (
+    "\nI should look at the company website first.\nAction: Read website content\n"
+    "Action Input: {\"website_url\": \"https://example.com\"}\nObservation: Example builds tools.\n"
+)
+
+
+def bag_of_words(text):
+    """Deterministic stand-in for the ONNX embedder"""
+    vector = np.zeros(256, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        vector[zlib.crc32(word.encode()) % 256] += 1.0
+    return vector
+
+
+def serialized(text):
+    return dumps([HumanMessage(content=text)])
+
+
+def response(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticResponseCache(embed=bag_of_words, database_path=str(tmp_path / "cache.db"), threshold=0.90)
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_vector_index_returns_nearest_ids_first():
+    index = VectorIndex(dim=3)
+    assert index.search(unit(1, 0, 0)) == []
+
+    index.add(10, unit(1, 0, 0))
+    index.add(11, unit(0, 1, 0))
+    index.add(12, unit(1, 1, 0))
+    index.add(13, unit(0, 0, 1))
+
+    assert index.search(unit(1, 0.1, 0), k=2) == [10, 12]
+    assert index.search(unit(0, 0, 1), k=1) == [13]
+    # Vectors added after a search are picked up by the next one
+    index.add(14, unit(0, 0.1, 1))
+    assert index.search(unit(0, 0.1, 1), k=1) == [14]
+
+
+def test_split_prompt_separates_role_and_scratchpad():
+    role, body, scratchpad = split_prompt(RESEARCHER + TASK + SCRATCHPAD)
+
+    assert role == "You are Research Analyst. Expert in analyzing company cultures."
+    assert body.endswith("\n\nThought:")
+    assert scratchpad == SCRATCHPAD
+
+
+def test_similar_prompt_at_same_step_is_served(cache):
+    cache.update(serialized(RESEARCHER + TASK), LLM_STRING, response("Action: Read website content"))
+
+    reworded = RESEARCHER + TASK.replace("Report the culture", "Report on the culture")
+    hit = cache.lookup(serialized(reworded), LLM_STRING)
+
+    assert hit is not None
+    assert hit[0].message.content == "Action: Read website content"
+
+
+def test_later_react_step_is_not_served_earlier_answer(cache):
+    cache.update(serialized(RESEARCHER + TASK), LLM_STRING, response("Action: Read website content"))
+
+    assert cache.lookup(serialized(RESEARCHER + TASK + SCRATCHPAD), LLM_STRING) is None
+
+
+def test_other_agent_is_not_served_same_template(cache):
+    cache.update(serialized(RESEARCHER + TASK), LLM_STRING, response("Action: Read website content"))
+
+    assert cache.lookup(serialized(WRITER + TASK), LLM_STRING) is None
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SemanticResponseCache(embed=bag_of_words, database_path=path).update(
+        serialized(RESEARCHER + TASK), LLM_STRING, response("Final Answer: done")
+    )
+
+    reopened = SemanticResponseCache(embed=bag_of_words, database_path=path)
+
+    assert reopened.lookup(serialized(RESEARCHER + TASK), LLM_STRING)[0].message.content == "Final Answer: done"
@@ -1,6 +1,150 @@
-from crewai_tools import SerperDevTool, ScrapeWebsiteTool
+from crewai_tools import BaseTool, SerperDevTool, ScrapeWebsiteTool
+from bs4 import BeautifulSoup
+from diskcache import Cache
+from pydantic.v1 import BaseModel, Field
+from requests.adapters import HTTPAdapter
+from typing import List, Type
+import requests
+import asyncio
+import hashlib
+import httpx
+import json
 import os
 
+def _build_http_session():
+    """Create a keep-alive HTTP session with a connection pool sized for concurrent tools"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# Shared by all tools so repeated searches and scrapes reuse open connections
+http_session = _build_http_session()
+
+# Scraped page text, so research steps reading the same site fetch it only once
+SCRAPE_CACHE_TTL = 86400  # Seconds a scraped page stays fresh
+scrape_cache = Cache(os.getenv('SCRAPE_CACHE_DIR', '.scrape_cache'))
+
+def _scrape_cache_key(url: str) -> str:
+    return hashlib.sha1(url.encode()).hexdigest()
+
+def _page_text(content: bytes) -> str:
+    """Extract the visible text of an HTML page, collapsing blank lines and spaces"""
+    parsed = BeautifulSoup(content, "html.parser")
+    text = parsed.get_text()
+    text = '\n'.join([i for i in text.split('\n') if i.strip() != ''])
+    text = ' '.join([i for i in text.split(' ') if i.strip() != ''])
+    return text
+
+class SessionSerperDevTool(SerperDevTool):
+    """SerperDevTool that sends its searches through the shared HTTP session"""
+    
+    def _run(self, **kwargs):
+        search_query = kwargs.get('search_query')
+        if search_query is None:
+            search_query = kwargs.get('query')
+        
+        payload = json.dumps({"q": search_query})
+        headers = {
+            'X-API-KEY': os.environ['SERPER_API_KEY'],
+            'content-type': 'application/json'
+        }
+        response = http_session.post(self.search_url, headers=headers, data=payload, timeout=30)
+        results = response.json()
+        if 'organic' not in results:
+            return results
+        
+        entries = []
+        for result in results['organic']:
+            try:
+                entries.append('\n'.join([
+                    f"Title: {result['title']}",
+                    f"Link: {result['link']}",
+                    f"Snippet: {result['snippet']}",
+                    "---"
+                ]))
+            except KeyError:
+                continue
+        content = '\n'.join(entries)
+        return f"\nSearch results: {content}\n"
+
+class SessionScrapeWebsiteTool(ScrapeWebsiteTool):
+    """ScrapeWebsiteTool that fetches pages through the shared HTTP session"""
+    
+    def _run(self, **kwargs):
+        website_url = kwargs.get('website_url', self.website_url)
+        key = _scrape_cache_key(website_url)
+        text = scrape_cache.get(key)
+        if text is not None:
+            return text
+        
+        page = http_session.get(
+            website_url,
+            timeout=15,
+            headers=self.headers,
+            cookies=self.cookies if self.cookies else {}
+        )
+        text = _page_text(page.content)
+        if page.ok:
+            scrape_cache.set(key, text, expire=SCRAPE_CACHE_TTL)
+        return text
+
+class AsyncScrapeWebsiteToolSchema(BaseModel):
+    """Input for AsyncScrapeWebsiteTool."""
+    website_urls: List[str] = Field(..., description="Mandatory list of website urls to read")
+
+class AsyncScrapeWebsiteTool(BaseTool):
+    """Reads several websites at once, fetching them concurrently"""
+    name: str = "Read multiple websites content"
+    description: str = "A tool that can be used to read the content of several websites at once, given a list of urls."
+    args_schema: Type[BaseModel] = AsyncScrapeWebsiteToolSchema
+    
+    def _run(self, **kwargs):
+        return asyncio.run(self._arun(kwargs.get('website_urls', [])))
+    
+    async def _arun(self, website_urls: List[str]) -> str:
+        """Fetch all uncached pages concurrently and parse them off the event loop"""
+        loop = asyncio.get_running_loop()
+        texts = {url: scrape_cache.get(_scrape_cache_key(url)) for url in website_urls}
+        missing = [url for url, text in texts.items() if text is None]
+        
+        async with httpx.AsyncClient(
+            headers=ScrapeWebsiteTool.model_fields['headers'].default,
+            timeout=15,
+            follow_redirects=True
+        ) as client:
+            responses = await asyncio.gather(
+                *(client.get(url) for url in missing),
+                return_exceptions=True
+            )
+        fetched = [
+            (url, response) for url, response in zip(missing, responses)
+            if not isinstance(response, Exception)
+        ]
+        
+        # BeautifulSoup parsing is CPU-bound, so run it in the default thread pool
+        parsed = await asyncio.gather(*(
+            loop.run_in_executor(None, _page_text, response.content)
+            for _, response in fetched
+        ))
+        for (url, response), text in zip(fetched, parsed):
+            texts[url] = text
+            if response.is_success:
+                scrape_cache.set(_scrape_cache_key(url), text, expire=SCRAPE_CACHE_TTL)
+        
+        errors = {
+            url: response for url, response in zip(missing, responses)
+            if isinstance(response, Exception)
+        }
+        sections = []
+        for url in website_urls:
+            if url in errors:
+                sections.append(f"Content of {url}:\nError reading website: {errors[url]}")
+            else:
+                sections.append(f"Content of {url}:\n{texts[url]}")
+        return '\n\n'.join(sections)
+
 class ToolsManager:
     """
     Manager class for all tools used in the job posting crew.
@@ -10,6 +154,7 @@ class ToolsManager:
     def __init__(self):
         self._serper_dev_tool = None
         self._scrape_website_tool = None
+        self._async_scrape_website_tool = None
     
     @property
     def serper_dev_tool(self):
@@ -19,21 +164,29 @@ class ToolsManager:
             api_key = os.getenv('SERPER_API_KEY')
             if not api_key:
                 print("Warning: SERPER_API_KEY not found in environment variables")
-            self._serper_dev_tool = SerperDevTool()
+            self._serper_dev_tool = SessionSerperDevTool()
         return self._serper_dev_tool
     
     @property
     def scrape_website_tool(self):
         """Initialize and return ScrapeWebsiteTool"""
         if self._scrape_website_tool is None:
-            self._scrape_website_tool = ScrapeWebsiteTool()
+            self._scrape_website_tool = SessionScrapeWebsiteTool()
         return self._scrape_website_tool
     
+    @property
+    def async_scrape_website_tool(self):
+        """Initialize and return AsyncScrapeWebsiteTool"""
+        if self._async_scrape_website_tool is None:
+            self._async_scrape_website_tool = AsyncScrapeWebsiteTool()
+        return self._async_scrape_website_tool
+    
     def get_research_tools(self):
         """Get tools for research agent"""
         return [
             self.serper_dev_tool,
-            self.scrape_website_tool
+            self.scrape_website_tool,
+            self.async_scrape_website_tool
         ]
     
     def get_writer_tools(self):